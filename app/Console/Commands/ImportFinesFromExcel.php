@@ -4,17 +4,27 @@
 
 use Illuminate\Console\Command;
 use App\Models\Fine;
+use App\Models\Vehicle;
 use Carbon\Carbon;
 use Maatwebsite\Excel\Facades\Excel;
 use Illuminate\Support\Facades\DB;
 
 class ImportFinesFromExcel extends Command
 {
-    protected $signature = 'import:fines {file?}';
-    protected $description = 'Import fines from Clean.xlsx into the fines table';
+    protected $signature = 'import:fines {file?} {--changeset= : JSON changeset (added/changed/removed) produced by scripts/fines_changeset.py}';
+    protected $description = 'Import fines from Clean.xlsx (or a changeset) into the fines table';
+
+    /**
+     * Ids of existing vehicles, loaded once per import
+     */
+    private $vehicleIds;
 
     public function handle()
     {
+        if ($changesetPath = $this->option('changeset')) {
+            return $this->importChangeset($changesetPath);
+        }
+
         $file = $this->argument('file') ?? base_path('scripts/Clean.xlsx');
         if (!file_exists($file)) {
             $this->error("File not found: $file");
@@ -65,24 +75,8 @@ public function handle()
                     $this->info("Row " . ($index + 1) . ": Replaced existing fine $uniqueKey");
                 }
 
-                // تحويل التاريخ إلى تنسيق MySQL
-                $mysqlDateTime = $this->parseDateTime($data['date and time'] ?? '');
-
-                // تنظيف قيمة amount من أي نصوص غير رقمية (مثل 'AED 600' تصبح 600)
-                $amountValue = $this->parseAmount($data['amount'] ?? '');
-
                 // تحويل الأعمدة حسب جدولك
-                Fine::create([
-                    'car_name'      => $data['car name'] ?? '',
-                    'plate_code'    => $data['plate code'] ?? '',
-                    'plate_number'  => $data['plate number'] ?? '',
-                    'dateandtime'   => $mysqlDateTime,
-                    'location'      => $data['location'] ?? '',
-                    'source'        => $data['source'] ?? '',
-                    'amount'        => $amountValue,
-                    'fine_number'   => $data['fine number'] ?? '',
-                    'details'       => $data['details'] ?? '',
-                    'dispute'       => !empty($data['dispute']) && strtolower($data['dispute']) == 'yes',
+                Fine::create($this->fineAttributes($data) + [
                     'created_at'    => Carbon::now(),
                     'updated_at'    => Carbon::now(),
                 ]);
@@ -103,7 +97,95 @@ public function handle()
         } else {
             $this->info("لا توجد مخالفات تمت إضافتها.");
         }
-        return $newCount;
+        // رمز الخروج 0 عند النجاح فقط: أي صف فشل يجب ألا يدخل لقطة fines_snapshot.json
+        return $errorCount > 0 ? self::FAILURE : self::SUCCESS;
+    }
+
+    /**
+     * Apply a changeset (added / changed / removed) so that writes scale with churn, not fleet size
+     */
+    private function importChangeset($path)
+    {
+        if (!file_exists($path)) {
+            $this->error("Changeset not found: $path");
+            return self::FAILURE;
+        }
+
+        $changeset = json_decode(file_get_contents($path), true);
+        if (!is_array($changeset)) {
+            $this->error("Invalid changeset: $path");
+            return self::FAILURE;
+        }
+
+        $added = $changeset['added'] ?? [];
+        $changed = $changeset['changed'] ?? [];
+        $removed = $changeset['removed'] ?? [];
+        $this->info("Applying changeset: " . count($added) . " added, " . count($changed) . " changed, " . count($removed) . " removed");
+
+        $newCount = 0;
+        $updatedCount = 0;
+
+        DB::transaction(function () use ($added, $changed, $removed, &$newCount, &$updatedCount) {
+            foreach (array_merge($added, $changed) as $row) {
+                $data = array_change_key_case($row, CASE_LOWER);
+                $uniqueKey = $data['fine number'] ?? '';
+                if (!$uniqueKey) {
+                    continue;
+                }
+
+                $fine = Fine::updateOrCreate(['fine_number' => $uniqueKey], $this->fineAttributes($data));
+                $fine->wasRecentlyCreated ? $newCount++ : $updatedCount++;
+            }
+
+            if ($removed) {
+                Fine::whereIn('fine_number', $removed)->delete();
+            }
+        });
+
+        $this->info("Changeset applied. Added: $newCount, Updated: $updatedCount, Removed: " . count($removed));
+        if ($newCount > 0) {
+            $this->info("تم إضافة $newCount مخالفة إلى قاعدة البيانات.");
+        }
+        return self::SUCCESS;
+    }
+
+    /**
+     * Map a Clean.xlsx row (lower-cased headers) to fines table columns
+     */
+    private function fineAttributes(array $data)
+    {
+        return [
+            'car_name'      => $data['car name'] ?? '',
+            'plate_code'    => $data['plate code'] ?? '',
+            'plate_number'  => $data['plate number'] ?? '',
+            // رقم السيارة في الأسطول حسب اللوحة (scripts/plate_index.py)
+            'vehicle_id'    => $this->existingVehicleId($data['vehicle id'] ?? ''),
+            // تحويل التاريخ إلى تنسيق MySQL
+            'dateandtime'   => $this->parseDateTime($data['date and time'] ?? ''),
+            'location'      => $data['location'] ?? '',
+            'source'        => $data['source'] ?? '',
+            // تنظيف قيمة amount من أي نصوص غير رقمية (مثل 'AED 600' تصبح 600)
+            'amount'        => $this->parseAmount($data['amount'] ?? ''),
+            'fine_number'   => $data['fine number'] ?? '',
+            'details'       => $data['details'] ?? '',
+            'dispute'       => !empty($data['dispute']) && strtolower($data['dispute']) == 'yes',
+        ];
+    }
+
+    /**
+     * The vehicle id if it still exists; the plate index may be a stale cache when its refresh failed
+     */
+    private function existingVehicleId($vehicleId)
+    {
+        if (!$vehicleId) {
+            return null;
+        }
+
+        if ($this->vehicleIds === null) {
+            $this->vehicleIds = Vehicle::pluck('id')->flip();
+        }
+
+        return $this->vehicleIds->has($vehicleId) ? $vehicleId : null;
     }
 
     /**
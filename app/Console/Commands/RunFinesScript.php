@@ -3,24 +3,22 @@
 namespace App\Console\Commands;
 
 use Illuminate\Console\Command;
-use Illuminate\Support\Facades\Storage;
 use Carbon\Carbon;
 
 class RunFinesScript extends Command
 {
     protected $signature = 'fines:run-script';
-    protected $description = 'Run the fines scraping script automatically';
+    protected $description = 'Run the adaptive fines sync scheduler (probes RTA and crawls only when needed)';
 
     public function handle()
     {
         $this->info('Starting fines script execution...');
 
         try {
-            // تشغيل السكريبت
-            $output = shell_exec('cd ' . base_path() . ' && python3 scripts/scrap_rta.py 2>&1');
+            // تشغيل المجدول: يقرر بنفسه بين فحص سريع للصفحة الأولى أو جمع كامل أو عدم فعل شيء
+            $output = shell_exec('cd ' . base_path() . ' && python3 scripts/sync_scheduler.py 2>&1');
 
-            // حفظ وقت آخر تحديث
-            Storage::put('last_sync.txt', Carbon::now()->toISOString());
+            // وقت آخر تحديث يكتبه create_empty_excel.py بعد نجاح الاستيراد فقط (storage/app/last_sync.txt)
 
             $this->info('Script executed successfully at: ' . Carbon::now()->toDateTimeString());
             $this->info('Output: ' . $output);
@@ -17,17 +17,18 @@ class RunScrapRtaScript extends Command
      *
      * @var string
      */
-    protected $description = 'Command description';
+    protected $description = 'Run a full RTA fines crawl and import through the locked sync scheduler';
 
     /**
      * Execute the console command.
      */
     public function handle()
     {
-        $scriptPath = base_path('scripts/scrap_rta.py');
+        // عبر المجدول حتى يأخذ قفل storage/app/rta_sync.lock ولا يتداخل مع المزامنة الدورية
+        $scriptPath = base_path('scripts/sync_scheduler.py');
         $output = [];
         $returnVar = 0;
-        exec("python3 $scriptPath", $output, $returnVar);
+        exec("cd " . escapeshellarg(base_path()) . " && python3 " . escapeshellarg($scriptPath) . " --full 2>&1", $output, $returnVar);
         $this->info(implode(PHP_EOL, $output));
         return $returnVar;
     }
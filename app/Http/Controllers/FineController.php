@@ -5,8 +5,6 @@
 use App\Models\Fine;
 use Illuminate\Http\Request;
 use Illuminate\Support\Facades\Artisan;
-use Illuminate\Support\Facades\Storage;
-use Carbon\Carbon;
 
 class FineController extends Controller
 {
@@ -19,17 +17,14 @@ public function index()
     public function runScript()
     {
         try {
-            // تشغيل السكريبت
-            $output = shell_exec('cd ' . base_path() . ' && python3 scripts/scrap_rta.py 2>&1');
-
-            // حفظ وقت آخر تحديث
-            Storage::put('last_sync.txt', Carbon::now()->toISOString());
+            // جمع كامل عبر المجدول حتى يأخذ نفس القفل (storage/app/rta_sync.lock) ولا يتداخل مع المزامنة الدورية
+            $output = shell_exec('cd ' . base_path() . ' && python3 scripts/sync_scheduler.py --full 2>&1');
 
             return response()->json([
                 'success' => true,
                 'message' => 'Script executed successfully',
                 'output' => $output,
-                'last_sync' => Carbon::now()->toISOString()
+                'last_sync' => $this->readLastSync()
             ]);
         } catch (\Exception $e) {
             return response()->json([
@@ -42,12 +37,18 @@ public function runScript()
 
     public function getLastSync()
     {
-        $lastSync = Storage::exists('last_sync.txt')
-            ? Storage::get('last_sync.txt')
-            : null;
-
         return response()->json([
-            'last_sync' => $lastSync
+            'last_sync' => $this->readLastSync()
         ]);
     }
+
+    /**
+     * Time of the last successful import, written by scripts/create_empty_excel.py
+     */
+    private function readLastSync()
+    {
+        $path = storage_path('app/last_sync.txt');
+
+        return file_exists($path) ? trim(file_get_contents($path)) : null;
+    }
 }
@@ -10,25 +10,63 @@ class ScriptController extends Controller
 {
     public function run(Request $request)
     {
-        $scriptPath = base_path('scripts/scrap_rta.py');
-        $logPath = storage_path('logs/scrap_rta.log');
+        // Go through the scheduler so a manual run takes the same lock as the every-minute sync
+        $scriptPath = base_path('scripts/sync_scheduler.py');
+        $logPath = storage_path('logs/scrap_rta.jsonl');
 
-        // Remove old log
-        if (file_exists($logPath)) {
-            unlink($logPath);
-        }
+        // The scripts write their own rotating JSON log, so the client tails it from the current end
+        clearstatcache();
+        $offset = file_exists($logPath) ? filesize($logPath) : 0;
 
-        // Run the script in the background and redirect output to log (unbuffered)
-        $cmd = "python3 -u " . escapeshellarg($scriptPath) . " > " . escapeshellarg($logPath) . " 2>&1 &";
+        // Run the script in the background
+        $cmd = "cd " . escapeshellarg(base_path()) . " && python3 " . escapeshellarg($scriptPath) . " --full > /dev/null 2>&1 &";
         exec($cmd);
 
-        return response()->json(['status' => 'started']);
+        return response()->json(['status' => 'started', 'offset' => $offset]);
     }
 
-    public function log()
+    public function log(Request $request)
     {
-        $logPath = storage_path('logs/scrap_rta.log');
-        $log = file_exists($logPath) ? file_get_contents($logPath) : '';
-        return response()->json(['log' => $log]);
+        $logPath = storage_path('logs/scrap_rta.jsonl');
+        $offset = max(0, (int) $request->query('offset', 0));
+        $maxBytes = 256 * 1024;
+
+        clearstatcache();
+        if (!file_exists($logPath)) {
+            return response()->json(['log' => '', 'offset' => 0]);
+        }
+
+        // The log was rotated since the last poll: start again from the new file
+        if ($offset > filesize($logPath)) {
+            $offset = 0;
+        }
+
+        $handle = fopen($logPath, 'rb');
+        fseek($handle, $offset);
+        $chunk = (string) fread($handle, $maxBytes);
+        fclose($handle);
+
+        // Only return complete lines; a partial last line is picked up on the next poll
+        $end = strrpos($chunk, "\n");
+        $end = $end === false ? 0 : $end + 1;
+        if ($end === 0 && strlen($chunk) === $maxBytes) {
+            // A single line longer than $maxBytes: skip it instead of stalling on it
+            $end = $maxBytes;
+        }
+
+        $lines = [];
+        foreach (explode("\n", substr($chunk, 0, $end)) as $line) {
+            $entry = json_decode($line, true);
+            if (!is_array($entry)) {
+                continue;
+            }
+            $time = date('H:i:s', (int) ($entry['t'] ?? 0));
+            $lines[] = "[$time] " . ($entry['l'] ?? 'I') . ' ' . ($entry['m'] ?? '');
+        }
+
+        return response()->json([
+            'log' => $lines ? implode("\n", $lines) . "\n" : '',
+            'offset' => $offset + $end,
+        ]);
     }
 }
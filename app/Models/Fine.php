@@ -3,11 +3,20 @@
 namespace App\Models;
 
 use Illuminate\Database\Eloquent\Model;
+use Illuminate\Database\Eloquent\Relations\BelongsTo;
 
 class Fine extends Model
 {
     protected $fillable = [
-        'car_name', 'plate_code', 'plate_number', 'dateandtime', 'location',
+        'car_name', 'plate_code', 'plate_number', 'vehicle_id', 'dateandtime', 'location',
         'source', 'amount', 'fine_number', 'details', 'dispute'
     ];
+
+    /**
+     * Fleet vehicle resolved from the fine's plate code and number.
+     */
+    public function vehicle(): BelongsTo
+    {
+        return $this->belongsTo(Vehicle::class);
+    }
 }
@@ -0,0 +1,29 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::table('fines', function (Blueprint $table) {
+            // Resolved by scripts/plate_index.py from plate code + number; null when unmatched
+            $table->foreignUuid('vehicle_id')->nullable()->after('plate_number')->constrained('vehicles')->nullOnDelete();
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('fines', function (Blueprint $table) {
+            $table->dropConstrainedForeignId('vehicle_id');
+        });
+    }
+};
@@ -11,12 +11,11 @@
     $this->comment(Inspiring::quote());
 })->purpose('Display an inspiring quote');
 
-// جدولة أمر تشغيل سكريبت البايثون كل يوم الساعة 12 ظهراً
-Schedule::command('run:scrap-rta')->dailyAt('12:00');
 Schedule::command('app:update-salik-trips')->dailyAt('012:00');
 
-// جدولة تشغيل سكريبت المخالفات كل 10 دقائق
-Schedule::command('fines:run-script')->everyTenMinutes();
+// جدولة مزامنة المخالفات: المجدول يعمل كل دقيقة ويحدد بنفسه موعد الفحص والجمع الكامل
+// (يحل محل الجمع اليومي run:scrap-rta الذي كان يشغل scrap_rta.py بدون القفل)
+Schedule::command('fines:run-script')->everyMinute()->runInBackground();
 
 // جدولة: إنهاء الحجوزات المعلقة التي مرّ عليها أكثر من 5 دقائق تلقائياً كل دقيقة
 Artisan::command('reservations:expire-pending', function () {
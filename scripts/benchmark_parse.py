@@ -0,0 +1,54 @@
+"""
+قياس سرعة تحليل التفاصيل حسب عدد العمليات.
+
+الاستخدام:
+    python3 benchmark_parse.py [عدد الصفوف] [حجم الدفعة]
+"""
+import os
+import sys
+import time
+
+from fines_parser import parse_details_list, DEFAULT_CHUNK_SIZE
+
+SAMPLE_DETAILS = """Fine Details
+Nissan Patrol
+DD
+{plate}
+Date and Time of Issuing The Fine:
+12 Jun 2025, 3:45 pm
+Location:
+Sheikh Zayed Road, Dubai
+Source:
+Dubai Police
+Amount:
+AED 600
+Fine Number:
+{fine}
+Details:
+Exceeding the speed limit by not more than 20 km/h
+Dispute:
+No
+Black points
+0"""
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHUNK_SIZE
+    details_list = [SAMPLE_DETAILS.format(plate=10000 + i % 90000, fine=60000000 + i) for i in range(rows)]
+    cores = os.cpu_count() or 1
+
+    print(f"Rows: {rows}, chunk size: {chunk_size}, cores: {cores}")
+    worker_counts = sorted({2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores} | {cores})
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = parse_details_list(details_list, workers=workers, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        assert len(result) == rows and result[-1]['Fine Number'] == str(60000000 + rows - 1)
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {elapsed:7.2f}s  speedup x{baseline / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,14 @@
 import pandas as pd
 import os
+import sys
 import subprocess
 from datetime import datetime
 import time
-
-# الأعمدة المطلوبة
-columns_needed = [
-    'Car Name', 'Plate Code', 'Plate Number', 'Date and Time', 'Location',
-    'Source', 'Amount', 'Fine Number', 'Details', 'Dispute'
-]
+from fines_parser import columns_needed, parse_details_list, default_workers
+from rta_logging import setup_logging, logging_paused
+from fines_changeset import load_snapshot, save_snapshot, diff_rows, is_empty, write_changeset
+from plate_index import resolve_fines, VEHICLE_ID_COLUMN
+import json
 
 # احصل على مسار مجلد السكريبت
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,30 +18,18 @@ project_dir = os.path.dirname(base_dir)
 os.chdir(project_dir)
 print(f"Changed working directory to: {project_dir}")
 
-# مسح محتوى ملف اللوج scrap_rta.log في بداية التشغيل
-log_path = os.path.join(project_dir, 'storage', 'logs', 'scrap_rta.log')
-with open(log_path, 'w') as log_file:
-    log_file.write('')
-
 # مسح ملف الحالة scrap_rta.done في بداية التشغيل
 status_path = os.path.join(project_dir, 'storage', 'logs', 'scrap_rta.done')
 if os.path.exists(status_path):
     os.remove(status_path)
 
-# توجيه كل print إلى ملف اللوج أيضاً
-import sys
-class Logger(object):
-    def __init__(self, log_path):
-        self.terminal = sys.stdout
-        self.log = open(log_path, "a", buffering=1, encoding='utf-8')
-    def write(self, message):
-        self.terminal.write(message)
-        self.log.write(message)
-    def flush(self):
-        self.terminal.flush()
-        self.log.flush()
-sys.stdout = Logger(log_path)
-sys.stderr = Logger(log_path)
+# توجيه كل print إلى السجل storage/logs/scrap_rta.jsonl (نفس سجل scrap_rta.py) مع عرضه في الطرفية
+setup_logging('create_empty_excel')
+
+# --partial: الجمع لم يغطِّ كل الصفحات (RTA_START_PAGE>1 أو توقف مبكر)، فلا يُحذف أي مخالفة
+partial = '--partial' in sys.argv
+if partial:
+    print("Partial crawl: fines missing from this run will not be removed.")
 
 # قراءة البيانات من violations_details.xlsx (من نفس مجلد السكريبت)
 details_excel_path = os.path.join(base_dir, 'violations_details.xlsx')
@@ -54,67 +42,42 @@ if not os.path.exists(details_excel_path):
 else:
     df = pd.read_excel(details_excel_path)
 
-# قائمة لتجميع النتائج
-clean_data = []
-
 progress_file = os.path.join(base_dir, 'progress.txt')
-total = len(df)
-for idx, row in enumerate(df.iterrows()):
-    series = row[1]
-    details = series['Details'] if 'Details' in series else str(series[0])
-    lines = [l.strip() for l in details.split('\n') if l.strip()]
-    car_name = ''
-    plate_code = ''
-    plate_number = ''
-    date_time = ''
-    location = ''
-    source = ''
-    amount = ''
-    fine_number = ''
-    details_field = ''
-    dispute = ''
-    for i, line in enumerate(lines):
-        if i == 1:
-            car_name = line
-        if i == 2:
-            plate_code = line
-        if i == 3:
-            plate_number = line
-        if line.startswith('Date and Time of Issuing The Fine:'):
-            date_time = lines[i+1] if i+1 < len(lines) else ''
-        if line.startswith('Location:'):
-            location = lines[i+1] if i+1 < len(lines) else ''
-        if line.startswith('Source:'):
-            source = lines[i+1] if i+1 < len(lines) else ''
-        if line.startswith('Amount:'):
-            amount = lines[i+1] if i+1 < len(lines) else ''
-        if line.startswith('Fine Number:'):
-            fine_number = lines[i+1] if i+1 < len(lines) else ''
-        if line.startswith('Details:'):
-            details_field = lines[i+1] if i+1 < len(lines) else ''
-        if line.startswith('Dispute:'):
-            dispute = lines[i+1] if i+1 < len(lines) else ''
-    clean_data.append({
-        'Car Name': car_name,
-        'Plate Code': plate_code,
-        'Plate Number': plate_number,
-        'Date and Time': date_time,
-        'Location': location,
-        'Source': source,
-        'Amount': amount,
-        'Fine Number': fine_number,
-        'Details': details_field,
-        'Dispute': dispute,
-    })
-    # تحديث نسبة التقدم كل 1% أو في آخر صف
-    if idx % max(1, total // 100) == 0 or idx == total - 1:
-        percent = int((idx + 1) / total * 100)
-        with open(progress_file, 'w') as pf:
-            pf.write(str(percent))
+def set_progress(percent):
+    with open(progress_file, 'w') as pf:
+        pf.write(str(percent))
+
+# تحليل التفاصيل على دفعات (وعلى عدة أنوية إذا تم ضبط FINES_PARSE_WORKERS)
+details_column = df['Details'] if 'Details' in df.columns else df.iloc[:, 0].astype(str)
+workers = default_workers()
+print(f"Parsing {len(df)} detail rows with {workers} worker(s)...")
+# خيط السجل يتوقف أثناء التحليل لأن العمليات الفرعية تُنشأ بـ fork
+with logging_paused():
+    clean_data = parse_details_list(details_column.tolist(), workers=workers, on_progress=set_progress)
+
+# ربط كل مخالفة بسيارة الأسطول حسب اللوحة (يضيف عمود Vehicle ID)
+plate_stats = resolve_fines(clean_data)
+print(f"Plate resolution: {plate_stats['matched']} matched, {plate_stats['unmatched']} unmatched "
+      f"({plate_stats['ambiguous']} ambiguous)")
+
+# مقاييس آخر تشغيل في storage/app/fines_metrics.json
+metrics_path = os.path.join(project_dir, 'storage', 'app', 'fines_metrics.json')
+metrics = {
+    'run_at': datetime.now().isoformat(),
+    'parsed_rows': len(clean_data),
+    'plates_matched': plate_stats['matched'],
+    'plates_unmatched': plate_stats['unmatched'],
+    'plates_ambiguous': plate_stats['ambiguous'],
+    'plate_index_refreshed': plate_stats['index_refreshed'],
+    'partial_crawl': partial,
+}
+def save_metrics():
+    with open(metrics_path, 'w') as f:
+        json.dump(metrics, f, indent=2)
 
 # إنشاء DataFrame جديد وحفظه في نفس مجلد السكريبت
 if clean_data:
-    clean_df = pd.DataFrame(clean_data, columns=columns_needed)
+    clean_df = pd.DataFrame(clean_data, columns=columns_needed + [VEHICLE_ID_COLUMN])
     clean_excel_path = os.path.join(base_dir, 'Clean.xlsx')
     clean_df.to_excel(clean_excel_path, index=False)
     print(f'Clean.xlsx created at {clean_excel_path}')
@@ -129,28 +92,67 @@ else:
         print("Exiting script due to no data to process.")
         exit(0)
 
-# حذف جميع البيانات من جدول fines قبل الاستيراد
-print("Deleting all data from fines table before import...")
-try:
-    delete_cmd = [
+# مقارنة المخالفات مع آخر لقطة ناجحة: إذا وجدت لقطة نستورد التغييرات فقط
+snapshot_path = os.path.join(project_dir, 'storage', 'app', 'fines_snapshot.json')
+changeset_path = os.path.join(base_dir, 'fines_changeset.json')
+snapshot = load_snapshot(snapshot_path) if clean_data else None
+changeset = None
+if snapshot is not None:
+    changeset = diff_rows(clean_data, snapshot, complete=not partial)
+    write_changeset(changeset_path, changeset)
+    print(f"Changeset saved to {changeset_path}: "
+          f"{len(changeset['added'])} added, {len(changeset['changed'])} changed, {len(changeset['removed'])} removed")
+    metrics.update({key: len(changeset[key]) for key in ('added', 'changed', 'removed')})
+    if is_empty(changeset):
+        print("No changes since last sync. Skipping import.")
+        save_metrics()
+        with open(status_path, 'w') as f:
+            f.write(str(int(time.time())))
+        with open(os.path.join(project_dir, 'storage', 'app', 'last_sync.txt'), 'w') as f:
+            f.write(datetime.now().isoformat())
+        exit(0)
+
+save_metrics()
+
+if changeset is None and partial:
+    # لا توجد لقطة سابقة والجمع جزئي: استيراد ما تم جمعه بدون حذف بقية الجدول
+    print("No previous snapshot and partial crawl. Importing without truncating the fines table...")
+    artisan_cmd = [
         "php",
         "artisan",
-        "tinker",
-        "--execute=App\\Models\\Fine::truncate(); echo 'Fines table truncated.';"
+        "import:fines",
+        clean_excel_path
+    ]
+elif changeset is None:
+    # لا توجد لقطة سابقة: حذف جميع البيانات من جدول fines ثم استيراد Clean.xlsx كاملاً
+    print("No previous snapshot. Deleting all data from fines table before full import...")
+    try:
+        delete_cmd = [
+            "php",
+            "artisan",
+            "tinker",
+            "--execute=App\\Models\\Fine::truncate(); echo 'Fines table truncated.';"
+        ]
+        delete_result = subprocess.run(delete_cmd, capture_output=True, text=True, timeout=30)
+        print(delete_result.stdout)
+    except Exception as delete_err:
+        print("Failed to truncate fines table:", delete_err)
+
+    # استيراد المخالفات من Clean.xlsx
+    artisan_cmd = [
+        "php",
+        "artisan",
+        "import:fines",
+        clean_excel_path
+    ]
+else:
+    # استيراد التغييرات فقط (إضافة/تعديل/حذف)
+    artisan_cmd = [
+        "php",
+        "artisan",
+        "import:fines",
+        f"--changeset={changeset_path}"
     ]
-    delete_result = subprocess.run(delete_cmd, capture_output=True, text=True, timeout=30)
-    print(delete_result.stdout)
-except Exception as delete_err:
-    print("Failed to truncate fines table:", delete_err)
-
-# استيراد فقط المخالفات الجديدة من Clean.xlsx
-# استخدام المسار النسبي بدلاً من المسار المطلق
-artisan_cmd = [
-    "php",
-    "artisan",
-    "import:fines",
-    clean_excel_path
-]
 
 print(f"Running command: {' '.join(artisan_cmd)}")
 print(f"Clean.xlsx path: {clean_excel_path}")
@@ -212,6 +214,12 @@ try:
     print("STDOUT:", result.stdout)
     print("STDERR:", result.stderr)
 
+    # حفظ اللقطة بعد نجاح الاستيراد لتكون أساس المقارنة في المزامنة التالية.
+    # بعد جمع جزئي تُدمج مع اللقطة السابقة، وبدون لقطة سابقة لا تُحفظ (الجدول لم يُفرغ)
+    if clean_data and (snapshot is not None or not partial):
+        save_snapshot(snapshot_path, clean_data, base=snapshot if partial else None)
+        print(f"Snapshot saved to {snapshot_path}")
+
     # تحليل الرسالة لمعرفة عدد المخالفات الجديدة
     if "لا توجد مخالفات جديدة" in result.stdout or "No new fines" in result.stdout:
         print("No new fines were added.")
@@ -266,11 +274,12 @@ finally:
         else:
             print(f"Not found: {f}")
 
-    # تسجيل وقت آخر مزامنة
+    # تسجيل وقت آخر مزامنة ناجحة (scrap_rta.done يُكتب فقط عند نجاح الاستيراد)
     last_sync_path = os.path.join(project_dir, 'storage', 'app', 'last_sync.txt')
-    try:
-        with open(last_sync_path, 'w') as f:
-            f.write(datetime.now().isoformat())
-        print(f"Last sync time saved to {last_sync_path}")
-    except Exception as e:
-        print(f"Failed to write last sync time: {e}")
+    if os.path.exists(status_path):
+        try:
+            with open(last_sync_path, 'w') as f:
+                f.write(datetime.now().isoformat())
+            print(f"Last sync time saved to {last_sync_path}")
+        except Exception as e:
+            print(f"Failed to write last sync time: {e}")
@@ -0,0 +1,84 @@
+"""
+مقارنة المخالفات المنظفة مع آخر لقطة (snapshot) لإنتاج ملف تغييرات:
+added / changed / removed حسب رقم المخالفة (Fine Number) وبصمة المحتوى.
+
+اللقطة تُحفظ في storage/app/fines_snapshot.json بعد نجاح الاستيراد فقط،
+وملف التغييرات هو ما يُمرر إلى php artisan import:fines --changeset.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+
+KEY_COLUMN = 'Fine Number'
+
+
+def row_hash(row):
+    """بصمة ثابتة لمحتوى الصف (بغض النظر عن ترتيب الأعمدة)."""
+    payload = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def index_rows(rows):
+    """رقم المخالفة -> الصف، مع تجاهل الصفوف بدون رقم (آخر تكرار هو المعتمد)."""
+    indexed = {}
+    for row in rows:
+        key = str(row.get(KEY_COLUMN) or '').strip()
+        if key:
+            indexed[key] = row
+    return indexed
+
+
+def load_snapshot(snapshot_path):
+    """إرجاع {رقم المخالفة: البصمة} من آخر لقطة، أو None إذا لم توجد لقطة صالحة."""
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['hashes']
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Ignoring unreadable snapshot {snapshot_path}: {e}")
+        return None
+
+
+def save_snapshot(snapshot_path, rows, base=None):
+    """
+    حفظ بصمات الصفوف. مع base (بصمات اللقطة السابقة) تُدمج البصمات الجديدة فوقها،
+    وذلك بعد جمع جزئي حتى لا تختفي المخالفات التي لم تُزر من اللقطة.
+    """
+    hashes = dict(base or {})
+    hashes.update({key: row_hash(row) for key, row in index_rows(rows).items()})
+    snapshot = {
+        'created_at': datetime.now().isoformat(),
+        'hashes': hashes,
+    }
+    tmp_path = snapshot_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, snapshot_path)
+
+
+def diff_rows(rows, snapshot, complete=True):
+    """
+    مقارنة الصفوف الحالية مع بصمات اللقطة السابقة.
+    removed فقط إذا كان الجمع كاملاً (complete): غياب مخالفة عن جمع جزئي لا يعني أنها حُذفت.
+    """
+    current = index_rows(rows)
+    added, changed = [], []
+    for key, row in current.items():
+        previous_hash = snapshot.get(key)
+        if previous_hash is None:
+            added.append(row)
+        elif previous_hash != row_hash(row):
+            changed.append(row)
+    removed = [key for key in snapshot if key not in current] if complete else []
+    return {'added': added, 'changed': changed, 'removed': removed}
+
+
+def is_empty(changeset):
+    return not (changeset['added'] or changeset['changed'] or changeset['removed'])
+
+
+def write_changeset(changeset_path, changeset):
+    with open(changeset_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(changeset, created_at=datetime.now().isoformat()), f, ensure_ascii=False, default=str)
@@ -0,0 +1,110 @@
+"""
+تحليل نصوص تفاصيل المخالفات (عمود Details في violations_details.xlsx) إلى أعمدة Clean.xlsx.
+
+parse_details_list يدعم التحليل المتوازي على عدة أنوية (ProcessPoolExecutor) على دفعات،
+مع الحفاظ على ترتيب الصفوف، وتقرير التقدم من العملية الأم عند نهاية كل دفعة فقط.
+لتقليل تكلفة النقل بين العمليات: العمليات الفرعية ترث النصوص عبر fork وتستلم حدود الدفعة فقط،
+وترجع tuples بترتيب columns_needed بدلاً من قاموس لكل صف.
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# الأعمدة المطلوبة
+columns_needed = [
+    'Car Name', 'Plate Code', 'Plate Number', 'Date and Time', 'Location',
+    'Source', 'Amount', 'Fine Number', 'Details', 'Dispute'
+]
+
+# عنوان الحقل في نص التفاصيل -> اسم العمود (القيمة في السطر التالي للعنوان)
+labelled_fields = [
+    ('Date and Time of Issuing The Fine:', 'Date and Time'),
+    ('Location:', 'Location'),
+    ('Source:', 'Source'),
+    ('Amount:', 'Amount'),
+    ('Fine Number:', 'Fine Number'),
+    ('Details:', 'Details'),
+    ('Dispute:', 'Dispute'),
+]
+
+# الأسطر 1 إلى 3 من التفاصيل: اسم السيارة، رمز اللوحة، رقم اللوحة
+positional_fields = {1: 'Car Name', 2: 'Plate Code', 3: 'Plate Number'}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+# النصوص التي ترثها العمليات الفرعية عبر fork (تُضبط قبل إنشاء العمليات)
+_fork_details = None
+
+
+def parse_details(details):
+    """تحويل نص تفاصيل مخالفة واحدة إلى قاموس بأعمدة Clean.xlsx."""
+    row = dict.fromkeys(columns_needed, '')
+    if not isinstance(details, str):
+        return row
+    lines = [l.strip() for l in details.split('\n') if l.strip()]
+    for i, line in enumerate(lines):
+        if i in positional_fields:
+            row[positional_fields[i]] = line
+        for label, column in labelled_fields:
+            if line.startswith(label):
+                row[column] = lines[i+1] if i+1 < len(lines) else ''
+    return row
+
+
+def parse_values(details):
+    """مثل parse_details لكن ترجع القيم فقط بترتيب columns_needed."""
+    row = parse_details(details)
+    return tuple(row[column] for column in columns_needed)
+
+
+def parse_chunk(details_chunk):
+    return [parse_values(details) for details in details_chunk]
+
+
+def parse_range(bounds):
+    """تحليل الدفعة _fork_details[start:end] داخل عملية فرعية."""
+    start, end = bounds
+    return parse_chunk(_fork_details[start:end])
+
+
+def default_workers():
+    """عدد العمليات من متغير البيئة FINES_PARSE_WORKERS (0 = عدد الأنوية)، والافتراضي 1."""
+    workers = int(os.environ.get('FINES_PARSE_WORKERS', '1'))
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def parse_details_list(details_list, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+    """
+    تحليل قائمة نصوص التفاصيل وإرجاع قائمة القواميس بنفس الترتيب.
+    on_progress(percent) يُستدعى من العملية الأم بعد كل دفعة.
+    """
+    global _fork_details
+    total = len(details_list)
+    if total == 0:
+        return []
+    chunks = [(i, min(i + chunk_size, total)) for i in range(0, total, chunk_size)]
+
+    clean_data = []
+
+    def collect(results):
+        for parsed in results:
+            clean_data.extend(dict(zip(columns_needed, values)) for values in parsed)
+            if on_progress:
+                on_progress(int(len(clean_data) / total * 100))
+
+    # create_empty_excel.py سكريبت بدون حماية __main__، لذلك نستخدم fork فقط
+    # (spawn يعيد تنفيذ السكريبت في كل عملية). بدون fork يتم التحليل في نفس العملية.
+    fork_available = 'fork' in multiprocessing.get_all_start_methods()
+    if workers <= 1 or len(chunks) == 1 or not fork_available:
+        collect(parse_chunk(details_list[start:end]) for start, end in chunks)
+    else:
+        context = multiprocessing.get_context('fork')
+        _fork_details = details_list
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                # map يحافظ على ترتيب الدفعات كما هي في المدخلات
+                collect(executor.map(parse_range, chunks))
+        finally:
+            _fork_details = None
+    return clean_data
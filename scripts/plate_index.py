@@ -0,0 +1,175 @@
+"""
+ربط المخالفات بسيارات الأسطول حسب رمز ورقم اللوحة.
+
+- normalize_plate: توحيد صيغة اللوحة، مثلاً 'DD 81307' أو 'DD' + '81307' أو 'Dubai DD-081307' -> ('DD', '81307')
+  والرموز الرقمية تبقى رمزاً: '1 12345' -> ('1', '12345')
+- فهرس اللوحات من جدول vehicles يُحفظ في storage/app/plate_index.json ويُحدَّث تدريجياً:
+  فقط السيارات التي تغيّر updated_at لها منذ آخر تحديث، مع حذف السيارات المحذوفة.
+- resolve_fines يضيف عمود 'Vehicle ID' لكل مخالفة ويرجع عدد المطابق وغير المطابق والمتعارض
+  (لوحة واحدة لأكثر من سيارة لا تُربط بأي منها).
+"""
+import json
+import os
+import re
+import subprocess
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(base_dir)
+
+INDEX_PATH = os.path.join(project_dir, 'storage', 'app', 'plate_index.json')
+EXPORT_MARKER = 'PLATE_INDEX:'
+# يُرفع عند تغيير normalize_plate حتى يُعاد بناء الفهرس المحفوظ بالكامل
+INDEX_VERSION = 2
+
+VEHICLE_ID_COLUMN = 'Vehicle ID'
+
+
+def normalize_plate(code, number=''):
+    """
+    ترجع (الرمز, الرقم) بصيغة موحدة. إذا لم يُعطَ الرقم منفصلاً يُستخرج من نص الرمز.
+    الرقم هو آخر مجموعة أرقام (بدون أصفار بادئة)، والرمز هو المجموعة التي قبله مباشرة
+    أحرفاً كانت أو أرقاماً (لتجاهل اسم الإمارة قبله).
+    """
+    text = f"{code or ''} {number or ''}".upper()
+    tokens = re.findall(r'[A-Z]+|\d+', text)
+    digit_positions = [i for i, token in enumerate(tokens) if token.isdigit()]
+    if not digit_positions:
+        return (tokens[-1] if tokens else ''), ''
+    position = digit_positions[-1]
+    plate_number = tokens[position].lstrip('0')
+    plate_code = tokens[position - 1] if position > 0 else ''
+    if plate_code.isdigit():
+        plate_code = plate_code.lstrip('0') or '0'
+    return plate_code, plate_number
+
+
+def plate_key(plate_code, plate_number):
+    return f"{plate_code}|{plate_number}"
+
+
+def load_index(index_path=INDEX_PATH):
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == INDEX_VERSION:
+                return index
+            print("Plate index was built with an older plate format, rebuilding")
+        except (ValueError, OSError) as e:
+            print(f"Ignoring unreadable plate index: {e}")
+    return {'version': INDEX_VERSION, 'synced_at': None, 'vehicles': {}}
+
+
+def save_index(index, index_path=INDEX_PATH):
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+
+def export_vehicles(since=None):
+    """
+    تصدير السيارات المتغيرة منذ since (أو كلها) مع قائمة كل المعرفات الحالية عبر artisan tinker.
+    ترجع {'ids': [...], 'vehicles': [{'id', 'plate_number', 'updated_at'}, ...]} أو None عند الفشل.
+    """
+    query = "App\\Models\\Vehicle::query()"
+    if since:
+        query += f"->where('updated_at', '>=', '{since}')"
+    php = (
+        f"$changed = {query}->get(['id', 'plate_number', 'updated_at'])"
+        "->map(fn ($v) => ['id' => $v->id, 'plate_number' => $v->plate_number, "
+        "'updated_at' => optional($v->updated_at)->toDateTimeString()]);"
+        f"echo '{EXPORT_MARKER}' . json_encode(['ids' => App\\Models\\Vehicle::pluck('id'), 'vehicles' => $changed]);"
+    )
+    try:
+        result = subprocess.run(["php", "artisan", "tinker", f"--execute={php}"],
+                                cwd=project_dir, capture_output=True, text=True, timeout=60)
+    except Exception as e:
+        print(f"Vehicle export failed: {e}")
+        return None
+    for line in result.stdout.splitlines():
+        if line.startswith(EXPORT_MARKER):
+            return json.loads(line[len(EXPORT_MARKER):])
+    print(f"Vehicle export returned no data: {result.stderr.strip()[:200]}")
+    return None
+
+
+def refresh_index(index):
+    """تحديث الفهرس تدريجياً. عند فشل التصدير يُستخدم الفهرس المحفوظ كما هو."""
+    export = export_vehicles(index.get('synced_at'))
+    if export is None:
+        return index, False
+
+    vehicles = index['vehicles']
+    current_ids = set(export['ids'])
+    for vehicle_id in [v for v in vehicles if v not in current_ids]:
+        del vehicles[vehicle_id]
+    for vehicle in export['vehicles']:
+        vehicles[vehicle['id']] = plate_key(*normalize_plate(vehicle['plate_number']))
+        if vehicle['updated_at'] and (not index['synced_at'] or vehicle['updated_at'] > index['synced_at']):
+            index['synced_at'] = vehicle['updated_at']
+    print(f"Plate index refreshed: {len(export['vehicles'])} changed, {len(vehicles)} vehicles")
+    return index, True
+
+
+class PlateResolver(object):
+    """
+    بحث مع ذاكرة مؤقتة: (رمز, رقم) -> رقم السيارة.
+    إذا كان الرمز ناقصاً في أحد الطرفين تُقبل المطابقة بالرقم وحده بشرط أن يكون فريداً.
+    اللوحة المشتركة بين أكثر من سيارة متعارضة (ambiguous) ولا تُربط بأي منها.
+    """
+
+    def __init__(self, index):
+        by_plate = {}
+        by_number = {}
+        by_number_uncoded = {}
+        for vehicle_id, key in index['vehicles'].items():
+            by_plate.setdefault(key, []).append(vehicle_id)
+            plate_code, number = key.split('|', 1)
+            by_number.setdefault(number, []).append(vehicle_id)
+            if not plate_code:
+                by_number_uncoded.setdefault(number, []).append(vehicle_id)
+        self.by_plate = {key: ids[0] for key, ids in by_plate.items() if len(ids) == 1}
+        self.ambiguous = {key for key, ids in by_plate.items() if len(ids) > 1}
+        self.by_number = {number: ids[0] for number, ids in by_number.items() if len(ids) == 1}
+        # سيارة بدون رمز تُقبل لمخالفة لها رمز فقط إذا كان رقمها فريداً بين كل السيارات
+        self.by_number_uncoded = {number: ids[0] for number, ids in by_number_uncoded.items()
+                                  if len(ids) == 1 and number in self.by_number}
+        self.cache = {}
+
+    def resolve(self, code, number):
+        """ترجع (رقم السيارة أو None, هل اللوحة متعارضة؟)."""
+        raw = (code, number)
+        if raw not in self.cache:
+            plate_code, plate_number = normalize_plate(code, number)
+            key = plate_key(plate_code, plate_number)
+            vehicle_id = None
+            if plate_number and key not in self.ambiguous:
+                fallback = self.by_number_uncoded if plate_code else self.by_number
+                vehicle_id = self.by_plate.get(key) or fallback.get(plate_number)
+            self.cache[raw] = (vehicle_id, key in self.ambiguous)
+        return self.cache[raw]
+
+
+def resolve_fines(clean_data, index_path=INDEX_PATH):
+    """
+    إضافة 'Vehicle ID' لكل مخالفة.
+    ترجع {'matched': n, 'unmatched': n, 'ambiguous': n, 'index_refreshed': bool}،
+    والمتعارضة محسوبة ضمن غير المطابقة.
+    """
+    index, refreshed = refresh_index(load_index(index_path))
+    if refreshed:
+        save_index(index, index_path)
+
+    resolver = PlateResolver(index)
+    matched = 0
+    ambiguous = 0
+    for row in clean_data:
+        vehicle_id, is_ambiguous = resolver.resolve(row.get('Plate Code'), row.get('Plate Number'))
+        row[VEHICLE_ID_COLUMN] = vehicle_id or ''
+        if vehicle_id:
+            matched += 1
+        elif is_ambiguous:
+            ambiguous += 1
+    return {'matched': matched, 'unmatched': len(clean_data) - matched, 'ambiguous': ambiguous,
+            'index_refreshed': refreshed}
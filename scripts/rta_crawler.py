@@ -0,0 +1,120 @@
+"""
+جمع المخالفات من جدول نتائج RTA في مرور واحد على الصفحات.
+
+لكل صف يُقرأ نص الملخص (المستخدم في violations.xlsx) ثم يُضغط عليه لقراءة
+لوحة التفاصيل .viewDetails (المستخدمة في violations_details.xlsx)،
+بدلاً من المرور على الصفحات مرتين.
+"""
+import logging
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+
+from rta_paginator import find_result_rows, max_rows_per_page, go_to_page, next_page
+from fines_parser import parse_details
+
+log = logging.getLogger('scrap_rta.crawler')
+
+INSTRUCTIONS_TEXT = 'Select a single fine to view its details'
+
+
+def read_details(driver, row, previous_text='', timeout=10):
+    """
+    الضغط على الصف وإرجاع نص لوحة التفاصيل.
+    اللوحة تبقى ظاهرة بعد أول صف، لذلك ننتظر حتى يختلف نصها عن آخر قراءة (previous_text)
+    بدلاً من قراءة لوحة الصف السابق. عند انتهاء المهلة يُرفع TimeoutException.
+    """
+    driver.execute_script("arguments[0].scrollIntoView();", row)
+    row.click()
+
+    def details_loaded(driver):
+        try:
+            panel = driver.find_element(By.CSS_SELECTOR, '.viewDetails')
+            text = panel.text if panel.is_displayed() else ''
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+        return text if text.strip() and text != previous_text else False
+
+    return WebDriverWait(driver, timeout, poll_frequency=0.2).until(details_loaded)
+
+
+def crawl_fines(driver, start_page=1):
+    """
+    المرور على كل صفحات الجدول مرة واحدة.
+    ترجع (details_list, violations_list, pages, complete) حيث details_list قائمة قواميس {'Details': ...}
+    و violations_list نصوص الملخص بدون تكرار، و complete تعني أن الجمع بدأ من الصفحة الأولى
+    ووصل إلى آخر صفحة (زر التالي معطّل) بدون توقف مبكر وبدون صفوف فشلت قراءة تفاصيلها.
+    """
+    max_rows_per_page(driver)
+    page_num = go_to_page(driver, start_page) if start_page > 1 else 1
+
+    details_list = []
+    violations_list = []
+    seen_fines = {}  # رقم المخالفة -> نص الصف الذي جاءت منه
+    seen_violations = set()
+    pages = 0
+    missed = 0
+    complete = False
+    details_text = ''
+
+    while True:
+        pages += 1
+        print(f"Collecting all rows from the table on page {page_num}...")
+        current_rows = find_result_rows(driver)
+        print(f"Page {page_num}: Found {len(current_rows)} rows to process")
+
+        for idx, row in enumerate(current_rows):
+            try:
+                row_text = row.text.strip()
+                log.debug(f"Row {idx+1}: {row_text}")
+                if not row_text or INSTRUCTIONS_TEXT in row_text:
+                    print(f"Skipping Row {idx+1} because it's empty or a instructions message.")
+                    continue
+
+                # نص الملخص قد يحتوي أكثر من مخالفة مفصولة بسطر فارغ
+                for single_violation in (vi.strip() for vi in row_text.split('\n\n')):
+                    if single_violation and single_violation not in seen_violations:
+                        seen_violations.add(single_violation)
+                        violations_list.append(single_violation)
+
+                if not row.is_displayed() or not row.is_enabled():
+                    continue
+                try:
+                    details_text = read_details(driver, row, details_text)
+                except Exception as e:
+                    details_text = ''
+                    missed += 1
+                    print(f"Failed to retrieve details for Row {idx+1}: {e}")
+                # تجنب تكرار نفس المخالفة (مثلاً إذا أعيد عرض صفحة) حسب رقم المخالفة من التفاصيل،
+                # وإلا حسب نص الصف والتفاصيل كاملاً
+                fine_key = parse_details(details_text)['Fine Number'] or f"{row_text}\n{details_text}"
+                if fine_key in seen_fines:
+                    if seen_fines[fine_key] != row_text:
+                        # نفس التفاصيل لصف مختلف: لوحة قديمة على الأرجح، فالمخالفة الحقيقية لم تُقرأ
+                        missed += 1
+                        print(f"Row {idx+1}: details repeat fine {fine_key} from another row, counted as missed")
+                    else:
+                        print(f"Skipping Row {idx+1}: fine already collected")
+                    continue
+                seen_fines[fine_key] = row_text
+                details_list.append({'Details': details_text})
+                print(f"Successfully processed row {len(details_list)} on page {page_num}")
+            except Exception as e:
+                missed += 1
+                print(f"Error processing Row {idx+1} on page {page_num}: {e}")
+                continue
+
+        # الانتقال للصفحة التالية وانتظار تغيّر الصفوف
+        try:
+            if not next_page(driver):
+                print("Next button is disabled. No more pages.")
+                # بدأنا من الصفحة الأولى ووصلنا للأخيرة وقرأنا كل الصفوف
+                complete = page_num == pages and not missed
+                break  # Last page
+            page_num += 1
+        except Exception as e:
+            print(f"Next button not found or error: {e}")
+            break
+
+    return details_list, violations_list, pages, complete
@@ -0,0 +1,255 @@
+"""
+سجل تشغيل سكريبتات المخالفات بصيغة JSON lines مع تدوير الملف حسب الحجم.
+
+- الكتابة تتم في خيط منفصل (QueueHandler / QueueListener) وبشكل مخزّن مؤقتاً،
+  ويتم تفريغ المخزن كل FLUSH_INTERVAL ثانية (حتى بدون رسائل جديدة) أو فوراً عند رسائل ERROR.
+- كل سطر: {"t": وقت unix, "l": المستوى, "n": اسم المصدر, "m": الرسالة}
+- عدة عمليات تكتب في نفس الملف: قبل كل كتابة يُقارن الملف على القرص بالملف المفتوح
+  (مثل WatchedFileHandler) ويُعاد فتحه إذا دوّرته عملية أخرى، والحجم يؤخذ من القرص.
+- print() و stderr يتم تحويلهما إلى السجل (INFO / ERROR) مع عرضهما في الطرفية.
+"""
+import atexit
+import contextlib
+import fcntl
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import traceback
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'storage', 'logs', 'scrap_rta.jsonl')
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+FLUSH_INTERVAL = 1.0
+
+LEVEL_NAMES = {
+    logging.DEBUG: 'D',
+    logging.INFO: 'I',
+    logging.WARNING: 'W',
+    logging.ERROR: 'E',
+    logging.CRITICAL: 'C',
+}
+
+_listener = None
+_file_handler = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            't': round(record.created, 3),
+            'l': LEVEL_NAMES.get(record.levelno, record.levelname),
+            'n': record.name,
+            'm': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['x'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+class RotatingJsonFileHandler(logging.Handler):
+    """
+    كتابة مخزّنة مؤقتاً في ملف ثنائي لتفادي seek/flush بعد كل رسالة كما في RotatingFileHandler.
+    الحجم = حجم الملف على القرص (يشمل ما كتبته العمليات الأخرى) + ما في المخزن ولم يُفرّغ بعد.
+    """
+
+    def __init__(self, path, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, flush_interval=FLUSH_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._open()
+
+    def _open(self):
+        self.stream = open(self.path, 'ab', buffering=64 * 1024)
+        self.pending = 0
+        self.size = self.stream.tell()
+
+    def _sync(self):
+        """إعادة فتح الملف إذا حُذف أو دُوّر من عملية أخرى، وتحديث الحجم من القرص."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+        opened = os.fstat(self.stream.fileno())
+        if st is None or (st.st_dev, st.st_ino) != (opened.st_dev, opened.st_ino):
+            self.stream.close()
+            self._open()
+        else:
+            self.size = st.st_size + self.pending
+
+    def _rotate(self, incoming):
+        # قفل التدوير بين العمليات، ثم إعادة الفحص: ربما دوّرت عملية أخرى الملف للتو
+        self.flush()
+        with open(self.path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._sync()
+            if not self.size or self.size + incoming <= self.max_bytes:
+                return
+            self.stream.close()
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{i + 1}")
+            if self.backup_count > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+            self._open()
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + '\n').encode('utf-8')
+            self._sync()
+            if self.max_bytes and self.size and self.size + len(data) > self.max_bytes:
+                self._rotate(len(data))
+            self.stream.write(data)
+            self.pending += len(data)
+            self.size += len(data)
+            if record.levelno >= logging.ERROR or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def handleError(self, record):
+        # لا نستخدم sys.stderr لأنه قد يكون محوّلاً إلى السجل نفسه
+        traceback.print_exc(file=sys.__stderr__)
+
+    def flush(self):
+        if self.stream and not self.stream.closed:
+            self.stream.flush()
+            self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+        super().close()
+
+
+class FlushingQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener يفرّغ المعالجات إذا لم تصل رسائل خلال flush_interval، حتى لا تبقى آخر
+    الأسطر في المخزن أثناء انتظار طويل (time.sleep أو WebDriverWait) ويتوقف عرض السجل.
+    """
+
+    def __init__(self, log_queue, *handlers, flush_interval=FLUSH_INTERVAL):
+        super().__init__(log_queue, *handlers)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        if not block:
+            return self.queue.get(False)
+        while True:
+            try:
+                return self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+
+
+class StreamToLogger(object):
+    """بديل sys.stdout / sys.stderr يحوّل كل سطر مكتمل إلى رسالة في السجل."""
+
+    def __init__(self, logger, level):
+        self.logger = logger
+        self.level = level
+        self.pending = ''
+
+    def write(self, message):
+        self.pending += message
+        while '\n' in self.pending:
+            line, self.pending = self.pending.split('\n', 1)
+            if line.strip():
+                self.logger.log(self.level, line)
+
+    def flush(self):
+        if self.pending.strip():
+            self.logger.log(self.level, self.pending)
+        self.pending = ''
+
+    def isatty(self):
+        return False
+
+
+def setup_logging(name, log_path=LOG_PATH, capture_print=True):
+    """
+    تهيئة السجل لسكريبت واحد. المستوى من متغير البيئة RTA_LOG_LEVEL (الافتراضي INFO).
+    ترجع logger باسم السكريبت.
+    """
+    global _listener, _file_handler
+    level = getattr(logging, os.environ.get('RTA_LOG_LEVEL', 'INFO').upper(), logging.INFO)
+
+    if _listener is None:
+        _file_handler = RotatingJsonFileHandler(log_path)
+        _file_handler.setFormatter(JsonLineFormatter())
+        console_handler = logging.StreamHandler(sys.__stdout__)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+
+        log_queue = queue.SimpleQueue()
+        _listener = FlushingQueueListener(log_queue, _file_handler, console_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        root = logging.getLogger()
+        root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logging.getLogger().setLevel(level)
+
+    logger = logging.getLogger(name)
+    if capture_print:
+        sys.stdout = StreamToLogger(logger, logging.INFO)
+        sys.stderr = StreamToLogger(logger, logging.ERROR)
+    return logger
+
+
+def flush_logs():
+    """تفريغ كل الرسائل المنتظرة إلى الملف (مثلاً قبل تشغيل سكريبت فرعي يكتب في نفس السجل)."""
+    if _listener is None:
+        return
+    for stream in (sys.stdout, sys.stderr):
+        if isinstance(stream, StreamToLogger):
+            stream.flush()
+    # إيقاف المستمع يفرغ الطابور بالكامل، ثم نعيد تشغيله
+    _listener.stop()
+    _file_handler.flush()
+    _listener.start()
+
+
+@contextlib.contextmanager
+def logging_paused():
+    """
+    إيقاف خيط الكتابة مؤقتاً حتى لا تكون العملية متعددة الخيوط عند fork (مثل ProcessPoolExecutor).
+    الرسائل أثناء الإيقاف تبقى في الطابور وتُكتب عند الاستئناف.
+    """
+    if _listener is None:
+        yield
+        return
+    for stream in (sys.stdout, sys.stderr):
+        if isinstance(stream, StreamToLogger):
+            stream.flush()
+    _listener.stop()
+    _file_handler.flush()
+    try:
+        yield
+    finally:
+        _listener.start()
+
+
+def shutdown_logging():
+    global _listener
+    if _listener is None:
+        return
+    for stream in (sys.stdout, sys.stderr):
+        if isinstance(stream, StreamToLogger):
+            stream.flush()
+    sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    _listener.stop()
+    _file_handler.close()
+    _listener = None
+
@@ -0,0 +1,220 @@
+"""
+أدوات التنقل في جدول نتائج المخالفات (PrimeNG paginator) على موقع RTA.
+
+- max_rows_per_page: اختيار أكبر عدد صفوف متاح في الصفحة قبل الجمع
+- go_to_page: الوصول إلى رقم صفحة معيّن (للاستكمال أو الجلب الموجّه)، مباشرة عبر حقل
+  "الانتقال إلى صفحة" إن وُجد، وإلا عبر روابط الصفحات الظاهرة
+- next_page: الانتقال للصفحة التالية وانتظار تغيّر الصفوف حسب مفاتيح الصفوف
+
+مفاتيح الصفوف ورقم الصفحة تُقرأ باستدعاء execute_script واحد بدلاً من عدة طلبات WebDriver لكل صف.
+"""
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+TABLE_ID = "Id_FinesResultTable"
+
+PAGINATOR = '.p-paginator'
+NEXT_BTN = '.p-paginator-next.p-paginator-element.p-link'
+PAGE_LINKS = '.p-paginator-pages .p-paginator-page'
+CURRENT_PAGE = '.p-paginator-pages .p-paginator-page.p-highlight'
+RPP_DROPDOWN = '.p-paginator .p-dropdown, .p-paginator .p-paginator-rpp-options'
+RPP_OPTIONS = '.p-dropdown-items .p-dropdown-item, .p-dropdown-panel li[role="option"]'
+JUMP_INPUT = '.p-paginator .p-paginator-page-input input'
+
+# مفتاح كل صف لاكتشاف تغيّر الصفحة: data-key أو data-fine-number إن وجدت، وإلا نص الصف كاملاً
+# (لا نستخدم id لأنه قد يكون موضعياً مثل row_0). الصفوف بنفس ترتيب المحاولات في find_result_rows
+PAGE_STATE_SCRIPT = """
+const table = document.getElementById(arguments[0]);
+const current = document.querySelector(arguments[1]);
+const page = current ? parseInt(current.textContent.trim(), 10) : NaN;
+let rows = [];
+if (table) {
+    rows = Array.from(table.querySelectorAll('.p-selectable-row'));
+    if (!rows.length) rows = Array.from(table.querySelectorAll('.fines_violation_list'));
+    if (!rows.length) rows = Array.from(table.querySelectorAll('tr')).slice(1);
+}
+const keys = rows.map(row => row.getAttribute('data-key') || row.getAttribute('data-fine-number')
+    || (row.innerText || '').trim()).filter(key => key);
+return [isNaN(page) ? null : page, keys];
+"""
+
+PAGE_CHANGE_TIMEOUT = 20
+
+
+def find_result_rows(driver):
+    """إرجاع صفوف جدول النتائج بنفس ترتيب المحاولات المعتمد في السكريبت."""
+    rows = driver.find_elements(By.CSS_SELECTOR, f'#{TABLE_ID} .p-selectable-row')
+    if not rows:
+        rows = driver.find_elements(By.CSS_SELECTOR, f'#{TABLE_ID} .fines_violation_list')
+    if not rows:
+        all_trs = driver.find_elements(By.CSS_SELECTOR, f'#{TABLE_ID} tr')
+        rows = all_trs[1:] if len(all_trs) > 1 else []
+    if not rows:
+        rows = driver.find_elements(By.CSS_SELECTOR, f'#{TABLE_ID} tr:not(:first-child)')
+    return rows
+
+
+def page_state(driver):
+    """(رقم الصفحة المميّز أو None, مفاتيح صفوف الصفحة الحالية) في طلب WebDriver واحد."""
+    page, keys = driver.execute_script(PAGE_STATE_SCRIPT, TABLE_ID, CURRENT_PAGE)
+    return page, keys
+
+
+def page_keys(driver):
+    """مفاتيح صفوف الصفحة الحالية."""
+    return page_state(driver)[1]
+
+
+def current_page(driver):
+    """رقم الصفحة الحالية حسب زر الصفحة المميّز، أو None إذا تعذرت قراءته."""
+    try:
+        return int(driver.find_element(By.CSS_SELECTOR, CURRENT_PAGE).text.strip())
+    except Exception:
+        return None
+
+
+def has_next_page(driver):
+    try:
+        next_btn = driver.find_element(By.CSS_SELECTOR, NEXT_BTN)
+    except Exception:
+        return False
+    return "p-disabled" not in (next_btn.get_attribute("class") or "")
+
+
+def wait_for_page_change(driver, previous_keys, expected_page=None, timeout=PAGE_CHANGE_TIMEOUT):
+    """
+    انتظار تحميل صفحة جديدة: تغيّر مفاتيح الصفوف عن الصفحة السابقة، ومطابقة رقم الصفحة
+    المميّز إذا تم تحديده وأمكن قراءته (الاعتماد على مفاتيح الصفوف وحدها إذا لم يُقرأ).
+    """
+    def page_changed(driver):
+        try:
+            page, keys = page_state(driver)
+        except StaleElementReferenceException:
+            return False
+        if expected_page is not None and page is not None and page != expected_page:
+            return False
+        return bool(keys) and keys != previous_keys
+
+    WebDriverWait(driver, timeout, poll_frequency=0.2).until(page_changed)
+
+
+def max_rows_per_page(driver, timeout=10):
+    """
+    اختيار أكبر خيار في قائمة "عدد الصفوف في الصفحة" إذا كان الجدول يوفرها.
+    ترجع العدد المختار أو None إذا لم تتوفر القائمة.
+    """
+    try:
+        dropdown = driver.find_element(By.CSS_SELECTOR, RPP_DROPDOWN)
+    except Exception:
+        print("Rows-per-page dropdown not found, keeping default page size")
+        return None
+
+    previous_keys = page_keys(driver)
+    driver.execute_script("arguments[0].click();", dropdown)
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.find_elements(By.CSS_SELECTOR, RPP_OPTIONS)
+        )
+    except TimeoutException:
+        print("Rows-per-page options did not open, keeping default page size")
+        return None
+
+    best_option, best_size = None, 0
+    for option in driver.find_elements(By.CSS_SELECTOR, RPP_OPTIONS):
+        text = option.text.strip()
+        if text.isdigit() and int(text) > best_size:
+            best_option, best_size = option, int(text)
+
+    if not best_option:
+        print("No numeric rows-per-page option found")
+        return None
+
+    if 'p-highlight' in (best_option.get_attribute('class') or ''):
+        print(f"Rows per page already at maximum: {best_size}")
+        driver.execute_script("arguments[0].click();", best_option)
+        return best_size
+
+    driver.execute_script("arguments[0].click();", best_option)
+    # إذا كانت كل النتائج في صفحة واحدة فقد لا تتغير الصفوف، لذلك المهلة لا تعتبر خطأ
+    try:
+        wait_for_page_change(driver, previous_keys, timeout=timeout)
+    except TimeoutException:
+        pass
+    print(f"Rows per page set to {best_size}")
+    return best_size
+
+
+def next_page(driver):
+    """الانتقال للصفحة التالية. ترجع False إذا كانت هذه آخر صفحة."""
+    if not has_next_page(driver):
+        return False
+    page, previous_keys = page_state(driver)
+    target = page + 1 if page is not None else None
+    driver.execute_script("arguments[0].click();", driver.find_element(By.CSS_SELECTOR, NEXT_BTN))
+    wait_for_page_change(driver, previous_keys, expected_page=target)
+    return True
+
+
+def jump_to_page(driver, target):
+    """
+    القفز مباشرة عبر حقل "الانتقال إلى صفحة" في الـ paginator إذا كان الموقع يعرضه.
+    ترجع True إذا وصلنا إلى target.
+    """
+    inputs = driver.find_elements(By.CSS_SELECTOR, JUMP_INPUT)
+    if not inputs:
+        return False
+    previous_keys = page_keys(driver)
+    inputs[0].clear()
+    inputs[0].send_keys(str(target), Keys.ENTER)
+    try:
+        wait_for_page_change(driver, previous_keys, expected_page=target)
+    except TimeoutException:
+        print(f"Jump-to-page input did not reach page {target}, using page links")
+        return False
+    return current_page(driver) in (target, None)
+
+
+def go_to_page(driver, target):
+    """
+    الوصول إلى الصفحة target: عبر jump_to_page إن أمكن، وإلا بالضغط على أقرب رابط صفحة ظاهر
+    في كل خطوة (نافذة الروابط الظاهرة تتقدم بضع صفحات في كل ضغطة، وهذا أسرع من "التالي"
+    صفحة بصفحة لكنه ليس قفزاً مباشراً). ترجع رقم الصفحة التي تم الوصول إليها.
+    """
+    if jump_to_page(driver, target):
+        return target
+    page = current_page(driver)
+    if page is None:
+        # بدون رقم صفحة مميّز نفترض البداية من الصفحة الأولى
+        page = 1
+    while page != target:
+        links = []
+        for link in driver.find_elements(By.CSS_SELECTOR, PAGE_LINKS):
+            text = link.text.strip()
+            if text.isdigit():
+                links.append((int(text), link))
+        if not links:
+            print(f"No page links found, staying on page {page}")
+            break
+
+        exact = [link for number, link in links if number == target]
+        if exact:
+            step, link = target, exact[0]
+        elif target > page:
+            step, link = max(links, key=lambda item: item[0])
+        else:
+            step, link = min(links, key=lambda item: item[0])
+
+        if step == page:
+            print(f"Page {target} is out of range, stopping at page {page}")
+            break
+
+        previous_keys = page_keys(driver)
+        driver.execute_script("arguments[0].click();", link)
+        wait_for_page_change(driver, previous_keys, expected_page=step)
+        page = step
+        time.sleep(0.2)
+    return page
@@ -11,19 +11,37 @@ import pandas as pd
 import re
 import subprocess
 import os
+import sys
+import json
+import logging
+from rta_crawler import crawl_fines
+from rta_paginator import page_keys
+from rta_logging import setup_logging, flush_logs
+
+# كل print يذهب إلى السجل storage/logs/scrap_rta.jsonl مع عرضه في الطرفية
+log = setup_logging('scrap_rta')
 
 # Enter file number here
 file_number = "51564893"  # You can change it to any file numbereaaaa
 
-# مسح ملفات الإكسل الموجودة في بداية السكريبت
-print("=== Cleaning up existing Excel files ===")
+# رقم الصفحة التي يبدأ منها الجمع (للاستكمال أو الجلب الموجّه)
+start_page = int(os.environ.get('RTA_START_PAGE', '1'))
+
+# وضع الفحص السريع (--probe): قراءة مفاتيح صفوف الصفحة الأولى فقط وحفظها في rta_probe.json
+# بدون فتح التفاصيل أو الاستيراد. يستخدمه sync_scheduler.py لتحديد الحاجة لجمع كامل.
+probe_mode = '--probe' in sys.argv
 base_dir = os.path.dirname(os.path.abspath(__file__))
-excel_files_to_clean = [
+probe_path = os.path.join(base_dir, 'rta_probe.json')
+
+# مسح ملفات الإكسل الموجودة في بداية السكريبت
+excel_files_to_clean = [] if probe_mode else [
     'violations.xlsx',
     'violations_details.xlsx',
     'Clean.xlsx'
 ]
 
+if excel_files_to_clean:
+    print("=== Cleaning up existing Excel files ===")
 for excel_file in excel_files_to_clean:
     file_path = os.path.join(base_dir, excel_file)
     if os.path.exists(file_path):
@@ -35,8 +53,9 @@ for excel_file in excel_files_to_clean:
     else:
         print(f"Not found: {excel_file}")
 
-print("=== Excel files cleanup completed ===")
-print()
+if excel_files_to_clean:
+    print("=== Excel files cleanup completed ===")
+    print()
 
 # Set up the browser
 options = webdriver.ChromeOptions()
@@ -76,10 +95,15 @@ driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () =>
 
 progress_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'progress.txt')
 def set_progress(val):
+    if probe_mode:
+        return  # الفحص السريع لا يغيّر شريط التقدم في الواجهة
     with open(progress_file, 'w') as pf:
         pf.write(str(val))
 set_progress(0)  # بدء العملية
 
+# يصبح True فقط إذا غطى الجمع كل الصفحات؛ غير ذلك لا يُحذف أي مخالفة من قاعدة البيانات
+crawl_complete = False
+
 try:
     # Open the website
     print("Opening the website...")
@@ -207,8 +231,21 @@ try:
         table = driver.find_element(By.ID, "Id_FinesResultTable")
         print("Found results table")
     except:
+        table = None
         print("Results table not found!")
 
+    if probe_mode and table is None:
+        sys.exit(1)
+    if table is not None:
+        # مفاتيح الصفحة الأولى: الفحص السريع يكتفي بها، والجمع الكامل يحفظها أيضاً
+        # ليعرفها المجدول عند الجمع اليدوي بدون فحص (sync_scheduler.py --full)
+        keys = page_keys(driver)
+        with open(probe_path, 'w') as pf:
+            json.dump({'checked_at': time.time(), 'keys': keys}, pf)
+        print(f"Probe: {len(keys)} rows on first page saved to {probe_path}")
+    if probe_mode:
+        sys.exit(0)
+
     # Check for any text containing "AED" or "Fine"
     page_text = driver.find_element(By.TAG_NAME, "body").text
     if "AED" in page_text:
@@ -261,68 +298,11 @@ try:
     if len(rows) > 5:
         print(f"... and {len(rows) - 5} more rows")
 
-    details_list = []
-    page_num = 1
-    processed_rows = 0
-
-    while True:
-        print(f"Collecting all rows from the table on page {page_num}...")
-        time.sleep(2)
-
-        # استخدام نفس منطق العثور على الصفوف
-        current_rows = []
-        current_rows = driver.find_elements(By.CSS_SELECTOR, '#Id_FinesResultTable .p-selectable-row')
-        if not current_rows:
-            current_rows = driver.find_elements(By.CSS_SELECTOR, '#Id_FinesResultTable .fines_violation_list')
-        if not current_rows:
-            all_trs = driver.find_elements(By.CSS_SELECTOR, '#Id_FinesResultTable tr')
-            current_rows = all_trs[1:] if len(all_trs) > 1 else []
-        if not current_rows:
-            current_rows = driver.find_elements(By.CSS_SELECTOR, '#Id_FinesResultTable tr:not(:first-child)')
-
-        print(f"Page {page_num}: Found {len(current_rows)} rows to process")
-
-        for idx, row in enumerate(current_rows):
-            try:
-                row_text = row.text.strip()
-                print(f"Row {idx+1}: {row_text}")
-                if not row_text or 'Select a single fine to view its details' in row_text:
-                    print(f"Skipping Row {idx+1} because it's empty or a instructions message.")
-                    continue
-                if not row.is_displayed() or not row.is_enabled():
-                    continue
-                driver.execute_script("arguments[0].scrollIntoView();", row)
-                time.sleep(0.5)
-                row.click()
-                print(f"Clicked Row {idx+1}")
-                WebDriverWait(driver, 10).until(
-                    EC.visibility_of_element_located((By.CSS_SELECTOR, '.viewDetails'))
-                )
-                time.sleep(0.5)
-                try:
-                    details_text = driver.find_element(By.CSS_SELECTOR, '.viewDetails').text
-                except Exception as e:
-                    details_text = ''
-                    print(f"Failed to retrieve details for Row {idx+1}: {e}")
-                details_list.append({'Details': details_text})
-                processed_rows += 1
-                print(f"Successfully processed row {processed_rows} on page {page_num}")
-            except Exception as e:
-                print(f"Error processing Row {idx+1} on page {page_num}: {e}")
-                continue
-
-        # Try to click the next button
-        try:
-            next_btn = driver.find_element(By.CSS_SELECTOR, '.p-paginator-next.p-paginator-element.p-link')
-            if "p-disabled" in next_btn.get_attribute("class"):
-                print("Next button is disabled. No more pages.")
-                break  # Last page
-            next_btn.click()
-            page_num += 1
-            time.sleep(2)  # Wait for the new page to load
-        except Exception as e:
-            print(f"Next button not found or error: {e}")
-            break
+    # مرور واحد على الصفحات يجمع الملخص والتفاصيل لكل صف معاً
+    details_list, violations_list, page_num, crawl_complete = crawl_fines(driver, start_page)
+    if not crawl_complete:
+        print("Crawl did not cover all pages; removed fines will not be detected in this run.")
+    processed_rows = len(details_list)
 
     print(f"=== FINAL SUMMARY ===")
     print(f"Total rows processed: {processed_rows}")
@@ -346,40 +326,41 @@ try:
         print(f'Empty details file created: {details_excel_path}')
         set_progress(40)
 
-    # Print all tr elements
-    trs = driver.find_elements(By.TAG_NAME, "tr")
-    print(f"Number of tr elements: {len(trs)}")
-    for i, tr in enumerate(trs):
-        print(f"tr[{i}]: {tr.text[:100]}")
+    # طباعة عناصر الصفحة للتشخيص فقط عند RTA_LOG_LEVEL=DEBUG
+    if log.isEnabledFor(logging.DEBUG):
+        trs = driver.find_elements(By.TAG_NAME, "tr")
+        log.debug(f"Number of tr elements: {len(trs)}")
+        for i, tr in enumerate(trs):
+            log.debug(f"tr[{i}]: {tr.text[:100]}")
 
-    # Print all div elements
-    divs = driver.find_elements(By.TAG_NAME, "div")
-    print(f"Number of div elements: {len(divs)}")
-    for i, div in enumerate(divs):
-        text = div.text.replace('\n', ' ')
-        if len(text) > 0:
-            print(f"div[{i}]: {text[:100]}")
+        divs = driver.find_elements(By.TAG_NAME, "div")
+        log.debug(f"Number of div elements: {len(divs)}")
+        for i, div in enumerate(divs):
+            text = div.text.replace('\n', ' ')
+            if len(text) > 0:
+                log.debug(f"div[{i}]: {text[:100]}")
 
     # Wait for table to appear
     table = wait.until(EC.presence_of_element_located((By.ID, "Id_FinesResultTable")))
     time.sleep(2)  # Safety increase
 
     # Print all child elements of the table and their text (with protection from StaleElementReferenceException)
-    all_children = table.find_elements(By.XPATH, './/*')
-    for i, child in enumerate(all_children):
-        try:
-            tag = child.tag_name
-        except Exception:
-            tag = 'N/A'
-        try:
-            cls = child.get_attribute('class')
-        except Exception:
-            cls = 'N/A'
-        try:
-            txt = child.text[:80]
-        except Exception:
-            txt = 'N/A'
-        print(f"Element {i}: tag={tag}, class={cls}, text={txt}")
+    if log.isEnabledFor(logging.DEBUG):
+        all_children = table.find_elements(By.XPATH, './/*')
+        for i, child in enumerate(all_children):
+            try:
+                tag = child.tag_name
+            except Exception:
+                tag = 'N/A'
+            try:
+                cls = child.get_attribute('class')
+            except Exception:
+                cls = 'N/A'
+            try:
+                txt = child.text[:80]
+            except Exception:
+                txt = 'N/A'
+            log.debug(f"Element {i}: tag={tag}, class={cls}, text={txt}")
 
     # Wait for results or no results message
     try:
@@ -399,56 +380,7 @@ try:
 
     else:
         for idx, result in enumerate(results, 1):
-            print(f"--- Result {idx} ---")
-            print(result.text)
-            print("----------------------\n")
-
-    # Extract all violations from the page
-    violations_list = []
-    page_num = 1
-    while True:
-        print(f"--- Collecting violations from page {page_num} ---")
-
-        # Try multiple selectors to find violations
-        violations = driver.find_elements(By.CSS_SELECTOR, '.row.fines_violation_list')
-        if not violations:
-            violations = driver.find_elements(By.CSS_SELECTOR, '.finesRowList')
-        if not violations:
-            violations = driver.find_elements(By.CSS_SELECTOR, '[class*="fines"]')
-        if not violations:
-            violations = driver.find_elements(By.CSS_SELECTOR, '[class*="violation"]')
-
-        print(f"Found {len(violations)} violation elements using CSS selectors")
-
-        for v in violations:
-            text = v.text.strip()
-            print(f"Raw violation text: {text[:200]}...")
-
-            # Split text if it contains more than one violation (empty lines '\n\n')
-            violations_split = [vi.strip() for vi in text.split('\n\n') if vi.strip()]
-            for single_violation in violations_split:
-                if single_violation and single_violation not in violations_list:
-                    violations_list.append(single_violation)
-                    print(f"Added violation: {single_violation[:100]}...")
-        # Search for next button
-        try:
-            next_btn = driver.find_element(By.CSS_SELECTOR, '.p-paginator-next.p-paginator-element.p-link')
-            if "p-disabled" in next_btn.get_attribute("class"):
-                break  # Button is not enabled (last page)
-            first_violation_text = violations[0].text.strip() if violations else None
-            num_violations = len(violations)
-            next_btn.click()
-            page_num += 1
-            def page_changed(driver):
-                new_violations = driver.find_elements(By.CSS_SELECTOR, '.row.fines_violation_list')
-                if len(new_violations) != num_violations:
-                    return True
-                if new_violations and new_violations[0].text.strip() != first_violation_text:
-                    return True
-                return False
-            WebDriverWait(driver, 20).until(page_changed)
-        except Exception:
-            break
+            log.debug(f"--- Result {idx} ---\n{result.text}")
 
     print(f"Collected {len(violations_list)} violations from all pages.")
 
@@ -518,17 +450,19 @@ try:
 finally:
     print("Closing the browser...")
     driver.quit()
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Ensure violations_details.xlsx exists before calling create_empty_excel.py
-    details_excel_path = os.path.join(base_dir, 'violations_details.xlsx')
-    if not os.path.exists(details_excel_path):
-        print(f"Creating violations_details.xlsx at: {details_excel_path}")
-        df = pd.DataFrame([{'Details': 'No details found'}])
-        df.to_excel(details_excel_path, index=False)
-        print(f"File created successfully: {details_excel_path}")
-    else:
-        print(f"File already exists: {details_excel_path}")
+    # في وضع الفحص السريع لا يوجد ما يتم استيراده
+    if not probe_mode:
+        # Ensure violations_details.xlsx exists before calling create_empty_excel.py
+        details_excel_path = os.path.join(base_dir, 'violations_details.xlsx')
+        if not os.path.exists(details_excel_path):
+            print(f"Creating violations_details.xlsx at: {details_excel_path}")
+            df = pd.DataFrame([{'Details': 'No details found'}])
+            df.to_excel(details_excel_path, index=False)
+            print(f"File created successfully: {details_excel_path}")
+        else:
+            print(f"File already exists: {details_excel_path}")
 
-    set_progress(50)  # قبل استدعاء create_empty_excel.py
-    subprocess.run(['python3', os.path.join(base_dir, 'create_empty_excel.py')])
+        set_progress(50)  # قبل استدعاء create_empty_excel.py
+        flush_logs()  # create_empty_excel.py يكتب في نفس ملف السجل
+        excel_args = [] if crawl_complete else ['--partial']
+        subprocess.run(['python3', os.path.join(base_dir, 'create_empty_excel.py')] + excel_args)
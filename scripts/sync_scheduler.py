@@ -0,0 +1,242 @@
+"""
+جدولة مزامنة المخالفات بشكل تكيّفي بدلاً من الجمع الكامل كل 10 دقائق.
+
+يُشغّل كل دقيقة (php artisan fines:run-script) ويقرر بنفسه ما يجب فعله:
+- فحص سريع للصفحة الأولى (scrap_rta.py --probe) عند حلول موعده؛ الفترة تقصر عند ظهور
+  مخالفات جديدة وتطول تدريجياً عند عدم وجود تغييرات.
+- جمع كامل واستيراد فقط إذا أظهر الفحص مفاتيح جديدة، أو إذا مرّ FULL_MAX_AGE منذ آخر جمع
+  كامل (لالتقاط المخالفات المدفوعة/المحذوفة التي لا تظهر في الصفحة الأولى).
+- تراجع أُسّي عند فشل موقع RTA أو بطئه.
+- قفل (flock) يمنع تداخل التشغيلات. التشغيل الدوري يتخطى الدورة إذا كان القفل مأخوذاً،
+  أما الجمع اليدوي (--full) فينتظر انتهاء التشغيل الحالي ثم يجمع مباشرة بدون فحص.
+
+الاستخدام:
+    python3 sync_scheduler.py          # تشغيل عادي حسب المواعيد
+    python3 sync_scheduler.py --full   # جمع كامل فوري (من الواجهة أو run:scrap-rta-script)
+"""
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+
+from rta_logging import setup_logging, flush_logs
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(base_dir)
+
+SCRAPER = os.path.join(base_dir, 'scrap_rta.py')
+PROBE_PATH = os.path.join(base_dir, 'rta_probe.json')
+DONE_PATH = os.path.join(project_dir, 'storage', 'logs', 'scrap_rta.done')
+LOCK_PATH = os.path.join(project_dir, 'storage', 'app', 'rta_sync.lock')
+STATE_PATH = os.path.join(project_dir, 'storage', 'app', 'rta_sync_state.json')
+METRICS_PATH = os.path.join(project_dir, 'storage', 'app', 'fines_metrics.json')
+
+MIN_PROBE_INTERVAL = 2 * 60
+MAX_PROBE_INTERVAL = 30 * 60
+PROBE_GROWTH = 1.5
+FULL_MAX_AGE = 24 * 60 * 60
+MAX_BACKOFF = 2 * 60 * 60
+
+PROBE_TIMEOUT = 5 * 60
+FULL_TIMEOUT = 3 * 60 * 60
+# فحص يستغرق أكثر من هذا يعني أن الموقع بطيء: نؤجل الفحص التالي
+SLOW_PROBE = 90
+
+# وزن آخر قياس في المتوسط المتحرك لمعدل المخالفات الجديدة (مخالفة/ساعة)
+RATE_SMOOTHING = 0.3
+
+DEFAULT_STATE = {
+    'probe_interval': MIN_PROBE_INTERVAL,
+    'next_probe_at': 0,
+    'last_probe_at': 0,
+    'last_full_at': 0,
+    'known_keys': [],
+    'new_fines_per_hour': 0.0,
+    'failures': 0,
+    'last_probe_seconds': None,
+    'last_full_seconds': None,
+}
+
+
+def load_state():
+    state = dict(DEFAULT_STATE)
+    if os.path.exists(STATE_PATH):
+        try:
+            with open(STATE_PATH, 'r') as f:
+                state.update(json.load(f))
+        except (ValueError, OSError) as e:
+            print(f"Ignoring unreadable scheduler state: {e}")
+    return state
+
+
+def save_state(state):
+    tmp_path = STATE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def run_script(args, timeout):
+    """تشغيل scrap_rta.py وإرجاع (نجح؟, المدة بالثواني)."""
+    flush_logs()  # scrap_rta.py يكتب في نفس ملف السجل
+    started = time.time()
+    try:
+        result = subprocess.run(['python3', SCRAPER] + args, cwd=project_dir, timeout=timeout)
+        ok = result.returncode == 0
+    except subprocess.TimeoutExpired:
+        print(f"scrap_rta.py {' '.join(args)} timed out after {timeout}s")
+        ok = False
+    return ok, time.time() - started
+
+
+def read_probe_keys():
+    """مفاتيح الصفحة الأولى التي حفظها scrap_rta.py، أو None إذا لم تُحفظ."""
+    try:
+        with open(PROBE_PATH, 'r') as f:
+            return json.load(f)['keys']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def probe():
+    """فحص الصفحة الأولى. ترجع (المفاتيح أو None عند الفشل, المدة)."""
+    if os.path.exists(PROBE_PATH):
+        os.remove(PROBE_PATH)
+    ok, elapsed = run_script(['--probe'], PROBE_TIMEOUT)
+    return (read_probe_keys() if ok else None), elapsed
+
+
+def full_crawl():
+    """
+    جمع كامل واستيراد. النجاح يُحدد من scrap_rta.done الذي يكتبه create_empty_excel.py.
+    ترجع (نجح؟, غطى كل الصفحات؟, المدة) حسب partial_crawl في fines_metrics.json.
+    """
+    started = int(time.time())
+    if os.path.exists(PROBE_PATH):
+        os.remove(PROBE_PATH)
+    ok, elapsed = run_script([], FULL_TIMEOUT)
+    try:
+        with open(DONE_PATH, 'r') as f:
+            done_at = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        done_at = 0
+    try:
+        with open(METRICS_PATH, 'r') as f:
+            complete = not json.load(f).get('partial_crawl', False)
+    except (OSError, ValueError):
+        complete = False
+    return ok and done_at >= started, complete, elapsed
+
+
+def back_off(state, now, reason):
+    state['failures'] += 1
+    delay = min(MAX_BACKOFF, MIN_PROBE_INTERVAL * 2 ** state['failures'])
+    state['next_probe_at'] = now + delay
+    print(f"{reason}. Failure #{state['failures']}, next attempt in {int(delay)}s")
+
+
+def update_rate(state, new_count, now):
+    """تحديث معدل المخالفات الجديدة وتعديل فترة الفحص بناءً عليه."""
+    hours = max(now - state['last_probe_at'], MIN_PROBE_INTERVAL) / 3600.0 if state['last_probe_at'] else 1.0
+    observed = new_count / hours
+    state['new_fines_per_hour'] = (RATE_SMOOTHING * observed
+                                   + (1 - RATE_SMOOTHING) * state['new_fines_per_hour'])
+    if new_count:
+        interval = MIN_PROBE_INTERVAL
+    else:
+        interval = state['probe_interval'] * PROBE_GROWTH
+        # مع معدل مرتفع لا نسمح للفترة بتجاوز الوقت المتوقع لظهور مخالفة جديدة
+        if state['new_fines_per_hour'] > 0:
+            interval = min(interval, 3600.0 / state['new_fines_per_hour'])
+    state['probe_interval'] = max(MIN_PROBE_INTERVAL, min(MAX_PROBE_INTERVAL, interval))
+
+
+def run(force_full=False):
+    state = load_state()
+    now = time.time()
+
+    if force_full:
+        # الجمع اليدوي لا ينتظر موعد الفحص ولا يحتاج فحصاً مسبقاً (جلسة متصفح واحدة فقط)
+        print("Manual full crawl requested")
+        return run_full_crawl(state)
+
+    # موعد الفحص التالي (ومعه التراجع عند الفشل) يسري حتى لو حان موعد الجمع الكامل
+    if now < state['next_probe_at']:
+        print(f"Nothing due. Next probe in {int(state['next_probe_at'] - now)}s")
+        return 0
+
+    # الفحص يسبق الجمع الكامل الدوري: فهو يكشف فشل الموقع مبكراً ويحدد مفاتيح الصفحة الأولى المعروفة
+    keys, elapsed = probe()
+    state['last_probe_seconds'] = round(elapsed, 1)
+    if keys is None:
+        back_off(state, now, "Probe failed")
+        save_state(state)
+        return 1
+
+    full_due = now - state['last_full_at'] >= FULL_MAX_AGE
+    known = set(state['known_keys'])
+    new_keys = [key for key in keys if key not in known]
+    update_rate(state, len(new_keys), now)
+    state['last_probe_at'] = now
+    state['failures'] = 0
+    state['next_probe_at'] = now + state['probe_interval']
+    if elapsed > SLOW_PROBE:
+        state['next_probe_at'] += state['probe_interval']
+        print(f"RTA site is slow ({elapsed:.0f}s probe), delaying next probe")
+    print(f"Probe found {len(keys)} rows, {len(new_keys)} new. "
+          f"Rate {state['new_fines_per_hour']:.2f}/h, next probe in {int(state['probe_interval'])}s")
+
+    if not new_keys and not full_due:
+        print("No new fines on the first page. Skipping full crawl.")
+        state['known_keys'] = keys
+        save_state(state)
+        return 0
+
+    return run_full_crawl(state)
+
+
+def run_full_crawl(state):
+    print("Running full crawl and import...")
+    ok, complete, elapsed = full_crawl()
+    state['last_full_seconds'] = round(elapsed, 1)
+    if not ok:
+        back_off(state, time.time(), "Full crawl failed")
+        save_state(state)
+        return 1
+
+    # جمع جزئي لا يكشف المخالفات المحذوفة، لذلك يبقى الجمع الكامل مستحقاً في المرة القادمة
+    if complete:
+        state['last_full_at'] = time.time()
+    else:
+        print("Crawl did not cover all pages; a full crawl is still due")
+    # مفاتيح الصفحة الأولى كما حفظها الجمع نفسه
+    keys = read_probe_keys()
+    if keys is not None:
+        state['known_keys'] = keys
+    print(f"Full crawl finished in {elapsed:.0f}s")
+    save_state(state)
+    return 0
+
+
+def main():
+    setup_logging('sync_scheduler')
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    force_full = '--full' in sys.argv
+    with open(LOCK_PATH, 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if not force_full:
+                print("Another sync is still running. Skipping.")
+                return 0
+            # الجمع اليدوي لا يُهمل: ننتظر انتهاء التشغيل الحالي
+            print("Another sync is still running. Waiting for it to finish...")
+            flush_logs()
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return run(force_full=force_full)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+<?php
+
+namespace Tests\Feature;
+
+use Tests\TestCase;
+use App\Models\Fine;
+use App\Models\Vehicle;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+use Illuminate\Support\Str;
+
+class ImportFinesChangesetTest extends TestCase
+{
+    use RefreshDatabase;
+
+    protected $changesetPath;
+
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        $this->changesetPath = tempnam(sys_get_temp_dir(), 'fines_changeset');
+    }
+
+    protected function tearDown(): void
+    {
+        @unlink($this->changesetPath);
+
+        parent::tearDown();
+    }
+
+    private function fineRow($fineNumber, array $overrides = [])
+    {
+        return array_merge([
+            'Car Name' => 'Nissan Patrol',
+            'Plate Code' => 'DD',
+            'Plate Number' => '81307',
+            'Vehicle ID' => '',
+            'Date and Time' => '12 Jun 2025, 3:45 pm',
+            'Location' => 'Sheikh Zayed Road, Dubai',
+            'Source' => 'Dubai Police',
+            'Amount' => 'AED 600',
+            'Fine Number' => $fineNumber,
+            'Details' => 'Exceeding the speed limit',
+            'Dispute' => 'No',
+        ], $overrides);
+    }
+
+    private function writeChangeset(array $changeset)
+    {
+        file_put_contents($this->changesetPath, json_encode($changeset));
+    }
+
+    public function test_changeset_adds_updates_and_removes_fines()
+    {
+        $vehicle = Vehicle::factory()->create(['plate_number' => 'DD-81307']);
+
+        Fine::create([
+            'car_name' => 'Nissan Patrol',
+            'plate_code' => 'DD',
+            'plate_number' => '81307',
+            'dateandtime' => '2025-06-01 10:00:00',
+            'amount' => 300,
+            'fine_number' => '60000001',
+        ]);
+        Fine::create([
+            'car_name' => 'Toyota Camry',
+            'plate_code' => 'AA',
+            'plate_number' => '12345',
+            'dateandtime' => '2025-06-02 10:00:00',
+            'amount' => 400,
+            'fine_number' => '60000002',
+        ]);
+
+        $this->writeChangeset([
+            'added' => [$this->fineRow('60000003', ['Vehicle ID' => $vehicle->id])],
+            'changed' => [$this->fineRow('60000001', ['Amount' => 'AED 1,000', 'Dispute' => 'Yes'])],
+            'removed' => ['60000002'],
+        ]);
+
+        $this->artisan('import:fines', ['--changeset' => $this->changesetPath])
+            ->assertExitCode(0);
+
+        $this->assertDatabaseHas('fines', [
+            'fine_number' => '60000003',
+            'vehicle_id' => $vehicle->id,
+            'amount' => 600,
+            'dateandtime' => '2025-06-12 15:45:00',
+        ]);
+        $this->assertDatabaseHas('fines', [
+            'fine_number' => '60000001',
+            'amount' => 1000,
+            'dispute' => true,
+        ]);
+        $this->assertDatabaseMissing('fines', ['fine_number' => '60000002']);
+        $this->assertEquals(2, Fine::count());
+    }
+
+    public function test_changeset_drops_vehicle_ids_that_no_longer_exist()
+    {
+        $this->writeChangeset([
+            'added' => [$this->fineRow('60000004', ['Vehicle ID' => (string) Str::uuid()])],
+            'changed' => [],
+            'removed' => [],
+        ]);
+
+        $this->artisan('import:fines', ['--changeset' => $this->changesetPath])
+            ->assertExitCode(0);
+
+        $this->assertDatabaseHas('fines', [
+            'fine_number' => '60000004',
+            'vehicle_id' => null,
+        ]);
+    }
+
+    public function test_missing_changeset_fails()
+    {
+        @unlink($this->changesetPath);
+
+        $this->artisan('import:fines', ['--changeset' => $this->changesetPath])
+            ->assertExitCode(1);
+    }
+}